@@ -1,24 +1,62 @@
 # app.py - Main application file
+# Patch blocking I/O for gevent before anything else imports socket/ssl/threading.
+# Production entrypoint: gunicorn -k gevent -w 1 --worker-connections 1000 app:app
+# Keep a single worker (gevent already multiplexes connections) and don't use --preload:
+# message dedupe and per-user reply rotation live in process memory.
+from gevent import monkey
+monkey.patch_all()
+
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import orjson
 import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import queue
 import os
 from datetime import datetime
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 import threading
 import time
+import atexit
+import itertools
+from collections import OrderedDict
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
+# Configure logging: request threads only enqueue records, a background
+# listener does the formatting and file/console writes
+log_queue = queue.SimpleQueue()
+log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+log_handlers = [
+    RotatingFileHandler('bot.log', maxBytes=10_000_000, backupCount=3, encoding='utf-8', delay=True),
+    logging.StreamHandler()
+]
+for handler in log_handlers:
+    handler.setFormatter(log_formatter)
+log_listener = QueueListener(log_queue, *log_handlers)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+# Attached directly rather than via basicConfig, which would give the QueueHandler
+# its own format and the listener would format each record twice
+root_logger = logging.getLogger()
+root_logger.setLevel(logging.INFO)
+root_logger.addHandler(QueueHandler(log_queue))
 logger = logging.getLogger(__name__)
 
 # Configuration
@@ -29,6 +67,10 @@ class Config:
         self.api_version = "v18.0"
         self.base_url = f"https://graph.facebook.com/{self.api_version}"
         
+        # Immutable request parts, built once instead of per call
+        self.batch_url = f"{self.base_url}/"
+        self.batch_params = {"access_token": self.page_access_token, "include_headers": "false"}
+        
     def load_token(self):
         """Load page access token from environment variable (Render) or token.txt (local)"""
         # Try environment variable first (for Render)
@@ -54,34 +96,110 @@ class Config:
 
 config = Config()
 
+# Bounded worker pool for outbound message processing
+WORKER_THREADS = int(os.getenv("WORKER_THREADS", 32))
+EXECUTOR = ThreadPoolExecutor(
+    max_workers=WORKER_THREADS,
+    thread_name_prefix="msgproc"
+)
+atexit.register(EXECUTOR.shutdown, wait=False)
+
+# Recently seen message ids, so webhook retries from Facebook are not answered twice
+SEEN_MIDS = TTLCache(maxsize=10000, ttl=300)
+SEEN_LOCK = threading.Lock()
+
+# Optional artificial delay before replying, in milliseconds (off by default)
+REPLY_DELAY = int(os.getenv("REPLY_DELAY_MS", "0")) / 1000
+
+# Shared HTTP session so keep-alive reuses the TLS connection to the Graph API
+SESSION = requests.Session()
+SESSION.headers.update({"User-Agent": "messenger-auto-reply-bot/2.0"})
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=max(64, WORKER_THREADS),  # never make a worker wait for a socket
+    max_retries=Retry(connect=3, backoff_factor=0.2)  # only connection failures; POSTs are never re-sent
+))
+
+# (second, ISO string) for the last formatted "now"
+_iso_now_cache = (0, "")
+
+def iso_now():
+    """Current local time as an ISO string, recomputed at most once per second"""
+    global _iso_now_cache
+    now = int(time.time())
+    cached = _iso_now_cache
+    if cached[0] != now:
+        cached = _iso_now_cache = (now, datetime.fromtimestamp(now).isoformat())
+    return cached[1]
+
 # Global state management
+USER_SHARDS = 16  # must be a power of two
+
 class BotState:
     def __init__(self):
         self.reply_index = 0
-        self.user_states = {}
-        self.lock = threading.Lock()
-        self.last_reply_reload = 0
+        # Per-user state is striped across shards, each guarded by its own lock
+        self.locks = [threading.Lock() for _ in range(USER_SHARDS)]
+        self.user_idx = [{} for _ in range(USER_SHARDS)]  # user_id -> reply index
+        self.user_lru = [OrderedDict() for _ in range(USER_SHARDS)]  # user_id -> last_active, oldest first
+        self.user_active_iso = [{} for _ in range(USER_SHARDS)]  # user_id -> (last_active, iso string), filled by /stats
+        self.lock = threading.Lock()  # guards the global reply_index
+        self.reload_lock = threading.Lock()
+        self.last_reply_reload_iso = None
+        self.replies_mtime = 0
         self.replies_cache = []
+        self.reply_bodies = {}  # reply text -> pre-encoded batch body
+        self.reply_cycle = itertools.cycle(self.replies_cache)
         
     def load_replies(self, force_reload=False):
-        """Load replies with caching and auto-reload"""
-        current_time = time.time()
+        """Load replies, re-parsing reply.txt only when its mtime changes"""
+        mtime = self.replies_file_mtime()
+        if mtime == self.replies_mtime and not force_reload:
+            return self.replies_cache
         
-        if force_reload or (current_time - self.last_reply_reload) > 30:
+        with self.reload_lock:
+            # Another thread may have reloaded while we waited
+            if mtime == self.replies_mtime and not force_reload:
+                return self.replies_cache
+            
             try:
                 with open("reply.txt", "r", encoding="utf-8") as file:
-                    self.replies_cache = [line.strip() for line in file if line.strip()]
-                self.last_reply_reload = current_time
+                    replies = [line.strip() for line in file if line.strip()]
+                # Truncate once here so sends can skip the check (Facebook limit: 2000 chars)
+                self.set_replies([r if len(r) <= 2000 else r[:1997] + "..." for r in replies])
                 logger.info(f"[+] Loaded {len(self.replies_cache)} replies")
             except FileNotFoundError:
                 logger.warning("[-] reply.txt not found, creating default replies")
                 self.create_default_replies()
+                mtime = self.replies_file_mtime()
             except Exception as e:
                 logger.error(f"[-] Error loading replies: {e}")
-                self.replies_cache = ["Thanks for messaging us! We'll get back to you soon. 😊"]
+                self.set_replies(["Thanks for messaging us! We'll get back to you soon. 😊"])
+            
+            self.replies_mtime = mtime
+            self.last_reply_reload_iso = iso_now()
         
         return self.replies_cache
     
+    def set_replies(self, replies):
+        """Replace the reply list and pre-encode each reply's message body"""
+        self.reply_bodies = {reply: MessengerAPI.message_body(reply) for reply in replies}
+        self.reply_cycle = itertools.cycle(replies)
+        self.replies_cache = replies
+    
+    @staticmethod
+    def to_datetime(monotonic_time):
+        """Convert a time.monotonic() timestamp to a wall-clock datetime"""
+        return datetime.fromtimestamp(time.time() - (time.monotonic() - monotonic_time))
+    
+    @staticmethod
+    def replies_file_mtime():
+        """Return reply.txt modification time in ns, or None if it is missing"""
+        try:
+            return os.stat("reply.txt").st_mtime_ns
+        except OSError:
+            return None
+    
     def create_default_replies(self):
         """Create default reply.txt if it doesn't exist"""
         default_replies = [
@@ -100,50 +218,95 @@ class BotState:
         try:
             with open("reply.txt", "w", encoding="utf-8") as file:
                 file.write("\n".join(default_replies))
-            self.replies_cache = default_replies
+            self.set_replies(default_replies)
             logger.info("[+] Created default reply.txt with sample replies")
         except Exception as e:
             logger.error(f"[-] Could not create reply.txt: {e}")
-            self.replies_cache = default_replies
+            self.set_replies(default_replies)
     
     def get_next_reply(self, user_id=None):
         """Get next reply with user-specific tracking"""
-        with self.lock:
-            replies = self.load_replies()
-            
-            if not replies:
-                return "Thanks for your message! 😊"
-            
-            if user_id:
-                if user_id not in self.user_states:
-                    self.user_states[user_id] = {"reply_index": 0, "last_active": time.time()}
-                
-                user_state = self.user_states[user_id]
-                reply = replies[user_state["reply_index"] % len(replies)]
-                user_state["reply_index"] += 1
-                user_state["last_active"] = time.time()
-            else:
-                reply = replies[self.reply_index % len(replies)]
+        replies = self.load_replies()
+        
+        if not replies:
+            return "Thanks for your message! 😊"
+        
+        if user_id:
+            shard = self._shard(user_id)
+            user_idx = self.user_idx[shard]
+            user_lru = self.user_lru[shard]
+            with self.locks[shard]:
+                # Indexes are stored already wrapped, so no modulo is needed
+                reply_count = len(replies)
+                reply_index = user_idx.get(user_id, 0)
+                if reply_index >= reply_count:  # reply list shrank on reload
+                    reply_index = 0
+                reply = replies[reply_index]
+                reply_index += 1
+                user_idx[user_id] = reply_index if reply_index < reply_count else 0
+                # Only touch the LRU order once per second per user
+                now = time.monotonic()
+                last_active = user_lru.get(user_id)
+                if last_active is None or now - last_active >= 1:
+                    user_lru[user_id] = now
+                    user_lru.move_to_end(user_id)
+        else:
+            with self.lock:
+                reply = next(self.reply_cycle)
                 self.reply_index += 1
-            
-            return reply
+        
+        return reply
+    
+    @staticmethod
+    def _shard(user_id):
+        return hash(user_id) & (USER_SHARDS - 1)
+    
+    def active_user_count(self):
+        """Number of tracked users across all shards"""
+        return sum(len(user_lru) for user_lru in self.user_lru)
+    
+    def user_activity(self, limit):
+        """Snapshot of up to `limit` users as (user_id, reply_index, last_active ISO string)"""
+        activity = []
+        for shard in range(USER_SHARDS):
+            active_iso = self.user_active_iso[shard]
+            with self.locks[shard]:
+                for user_id, last_active in self.user_lru[shard].items():
+                    if len(activity) >= limit:
+                        return activity
+                    # Only format timestamps that changed since the last snapshot
+                    cached = active_iso.get(user_id)
+                    if cached is None or cached[0] != last_active:
+                        cached = active_iso[user_id] = (last_active, self.to_datetime(last_active).isoformat())
+                    activity.append((user_id, self.user_idx[shard][user_id], cached[1]))
+        return activity
     
     def cleanup_inactive_users(self):
         """Clean up inactive users (older than 1 hour)"""
-        current_time = time.time()
+        current_time = time.monotonic()
         inactive_threshold = 3600
+        removed = 0
         
-        with self.lock:
-            inactive_users = [
-                user_id for user_id, state in self.user_states.items()
-                if current_time - state["last_active"] > inactive_threshold
-            ]
-            
-            for user_id in inactive_users:
-                del self.user_states[user_id]
+        for shard in range(USER_SHARDS):
+            user_idx = self.user_idx[shard]
+            user_lru = self.user_lru[shard]
+            active_iso = self.user_active_iso[shard]
+            with self.locks[shard]:
+                # user_lru is ordered by activity, so stop at the first active user
+                inactive_users = []
+                for user_id, last_active in user_lru.items():
+                    if current_time - last_active <= inactive_threshold:
+                        break
+                    inactive_users.append(user_id)
                 
-            if inactive_users:
-                logger.info(f"[+] Cleaned up {len(inactive_users)} inactive users")
+                for user_id in inactive_users:
+                    del user_lru[user_id]
+                    del user_idx[user_id]
+                    active_iso.pop(user_id, None)
+            removed += len(inactive_users)
+        
+        if removed:
+            logger.info(f"[+] Cleaned up {removed} inactive users")
 
 bot_state = BotState()
 
@@ -151,104 +314,98 @@ class MessengerAPI:
     """Handle Facebook Messenger API interactions"""
     
     @staticmethod
-    def send_message(recipient_id, text, message_type="RESPONSE"):
-        """Send message with error handling"""
+    def message_body(text, message_type="RESPONSE"):
+        """Form-encoded message fields for a batch item body"""
+        return urlencode({"message": orjson.dumps({"text": text}), "messaging_type": message_type})
+
+    @staticmethod
+    def send_batch(replies, message_type="RESPONSE"):
+        """Send (recipient_id, text) replies via Graph API batch requests"""
         if not config.page_access_token:
             logger.error("[-] Access token missing")
-            return False
+            return [False] * len(replies)
+
+        results = []
+        # Graph API accepts at most 50 requests per batch
+        for start in range(0, len(replies), 50):
+            results.extend(MessengerAPI._send_batch_chunk(replies[start:start + 50], message_type))
+        return results
+
+    @staticmethod
+    def _send_batch_chunk(replies, message_type):
+        batch = []
+        for recipient_id, text in replies:
+            # Replies from reply.txt are pre-encoded; only the recipient varies per send
+            body = bot_state.reply_bodies.get(text) if message_type == "RESPONSE" else None
+            if body is None:
+                body = MessengerAPI.message_body(text, message_type)
+            
+            recipient = urlencode({"recipient": orjson.dumps({"id": recipient_id})})
+            batch.append({
+                "method": "POST",
+                "relative_url": "me/messages",
+                "body": f"{recipient}&{body}"
+            })
 
-        url = f"{config.base_url}/me/messages"
-        params = {"access_token": config.page_access_token}
-        headers = {"Content-Type": "application/json"}
-        
-        # Truncate message if too long (Facebook limit: 2000 chars)
-        if len(text) > 2000:
-            text = text[:1997] + "..."
-        
-        data = {
-            "recipient": {"id": recipient_id},
-            "message": {"text": text},
-            "messaging_type": message_type
-        }
-        
         try:
-            response = requests.post(
-                url, 
-                params=params, 
-                headers=headers, 
-                json=data, 
+            response = SESSION.post(
+                config.batch_url,
+                params=config.batch_params,
+                data={"batch": orjson.dumps(batch)},
                 timeout=10
             )
-            
-            if response.status_code == 200:
-                logger.info(f"[+] Message sent to {recipient_id}: {text[:50]}...")
-                return True
-            else:
-                try:
-                    error_data = response.json()
-                    logger.error(f"[-] API Error: {error_data}")
-                except:
-                    logger.error(f"[-] HTTP Error: {response.status_code} - {response.text}")
-                return False
+
+            if response.status_code != 200:
+                logger.error(f"[-] Batch HTTP Error: {response.status_code} - {response.text}")
+                return [False] * len(replies)
+
+            # Each batch item carries its own status code
+            item_results = orjson.loads(response.content)
+            results = []
+            for (recipient_id, text), result in zip(replies, item_results):
+                code = result.get("code") if result else None
+                success = code == 200
+                if not success:
+                    logger.error(f"[-] Batch item failed for {recipient_id}: {code} - {result.get('body') if result else None}")
                 
+                if success:
+                    logger.info(f"[+] Message sent to {recipient_id}: {text[:50]}...")
+                results.append(success)
+            return results
+
         except requests.exceptions.Timeout:
             logger.error("[-] Request timeout")
-            return False
         except requests.exceptions.RequestException as e:
             logger.error(f"[-] Request error: {e}")
-            return False
         except Exception as e:
             logger.error(f"[-] Unexpected error: {e}")
-            return False
-    
-    @staticmethod
-    def send_typing_indicator(recipient_id, action="typing_on"):
-        """Send typing indicator for natural conversation feel"""
-        if not config.page_access_token:
-            return False
-
-        url = f"{config.base_url}/me/messages"
-        params = {"access_token": config.page_access_token}
-        headers = {"Content-Type": "application/json"}
-        
-        data = {
-            "recipient": {"id": recipient_id},
-            "sender_action": action
-        }
-        
-        try:
-            response = requests.post(url, params=params, headers=headers, json=data, timeout=5)
-            return response.status_code == 200
-        except:
-            return False
+        return [False] * len(replies)
 
 class MessageProcessor:
     """Process incoming messages and generate responses"""
     
     @staticmethod
     def process_message(sender_id, message_text, message_id):
-        """Main message processing logic"""
+        """Main message processing logic, returns the reply text"""
         logger.info(f"[+] Processing message from {sender_id}: {message_text[:100]}...")
         
-        # Send typing indicator
-        MessengerAPI.send_typing_indicator(sender_id, "typing_on")
-        
-        # Small delay for natural response timing
-        time.sleep(1)
-        
         # Get sequential reply
-        reply_text = bot_state.get_next_reply(sender_id)
-        
-        # Send the reply
-        success = MessengerAPI.send_message(sender_id, reply_text)
+        return bot_state.get_next_reply(sender_id)
+    
+    @staticmethod
+    def send_replies(replies):
+        """Send all (sender_id, reply_text) pairs collected from one webhook call"""
+        # Optional delay for natural response timing
+        if REPLY_DELAY:
+            time.sleep(REPLY_DELAY)
         
-        # Turn off typing indicator
-        MessengerAPI.send_typing_indicator(sender_id, "typing_off")
+        results = MessengerAPI.send_batch(replies)
         
-        if success:
-            logger.info(f"[+] Auto-reply sent to {sender_id}")
-        else:
-            logger.error(f"[-] Failed to send reply to {sender_id}")
+        for (sender_id, _), success in zip(replies, results):
+            if success:
+                logger.info(f"[+] Auto-reply sent to {sender_id}")
+            else:
+                logger.error(f"[-] Failed to send reply to {sender_id}")
 
 # Main webhook endpoint
 @app.route("/webhook", methods=["GET", "POST"])
@@ -274,15 +431,28 @@ def handle_webhook_verification():
 def handle_webhook_event():
     """Handle incoming Facebook webhook events"""
     try:
-        data = request.json
+        raw = request.get_data()
+        
+        # Read/delivery receipts make up most traffic; skip parsing webhook payloads with
+        # nothing to answer. Anything not shaped like {"object":...,"entry":...} is parsed
+        # as usual so empty or malformed bodies still get 400/500.
+        if (raw.startswith(b'{"object"') and raw.rstrip().endswith(b'}') and b'"entry"' in raw
+                and b'"message"' not in raw and b'"postback"' not in raw):
+            return jsonify({"status": "ok"}), 200
+        
+        data = orjson.loads(raw) if raw else None
         
         if not data:
             return jsonify({"error": "No data received"}), 400
         
-        # Process each entry in the webhook data
+        # Process each entry in the webhook data, collecting replies to send in one batch
+        replies = []
         for entry in data.get("entry", []):
             for messaging_event in entry.get("messaging", []):
-                process_messaging_event(messaging_event)
+                process_messaging_event(messaging_event, replies)
+        
+        if replies:
+            EXECUTOR.submit(MessageProcessor.send_replies, replies)
         
         return jsonify({"status": "ok"}), 200
         
@@ -290,8 +460,11 @@ def handle_webhook_event():
         logger.error(f"[-] Webhook processing error: {e}")
         return jsonify({"error": "Processing failed"}), 500
 
-def process_messaging_event(messaging_event):
-    """Process individual messaging events"""
+def process_messaging_event(messaging_event, replies):
+    """Process individual messaging events, appending outbound replies to `replies`"""
+    if not ("message" in messaging_event or "postback" in messaging_event):
+        return
+    
     sender_id = messaging_event.get("sender", {}).get("id")
     
     if not sender_id:
@@ -299,35 +472,38 @@ def process_messaging_event(messaging_event):
     
     # Handle different event types
     if "message" in messaging_event:
-        handle_message_event(messaging_event, sender_id)
+        handle_message_event(messaging_event, sender_id, replies)
     elif "postback" in messaging_event:
-        handle_postback_event(messaging_event, sender_id)
+        handle_postback_event(messaging_event, sender_id, replies)
 
-def handle_message_event(messaging_event, sender_id):
+def handle_message_event(messaging_event, sender_id, replies):
     """Handle incoming text messages"""
     message = messaging_event["message"]
+    message_id = message.get("mid", "")
+    
+    # Skip redelivered webhook events
+    if message_id:
+        with SEEN_LOCK:
+            if message_id in SEEN_MIDS:
+                return
+            SEEN_MIDS[message_id] = 1
     
     # Handle text messages
     if "text" in message:
         message_text = message["text"]
-        message_id = message.get("mid", "")
         
         if message_text.strip():  # Only process non-empty messages
-            # Process in background thread
-            threading.Thread(
-                target=MessageProcessor.process_message,
-                args=(sender_id, message_text, message_id),
-                daemon=True
-            ).start()
+            reply_text = MessageProcessor.process_message(sender_id, message_text, message_id)
+            replies.append((sender_id, reply_text))
     
     # Handle attachments (images, files, etc.)
     elif "attachments" in message:
-        MessengerAPI.send_message(
+        replies.append((
             sender_id, 
             "Thanks for sharing! 📎 I can respond to text messages. How can I help you today?"
-        )
+        ))
 
-def handle_postback_event(messaging_event, sender_id):
+def handle_postback_event(messaging_event, sender_id, replies):
     """Handle button clicks and postbacks"""
     postback = messaging_event["postback"]
     payload = postback.get("payload", "")
@@ -335,10 +511,10 @@ def handle_postback_event(messaging_event, sender_id):
     logger.info(f"[+] Postback from {sender_id}: {payload}")
     
     if payload == "GET_STARTED":
-        MessengerAPI.send_message(
+        replies.append((
             sender_id,
             "🎉 Welcome! Thanks for getting started. How can we help you today?"
-        )
+        ))
 
 # Management and monitoring endpoints
 @app.route("/", methods=["GET"])
@@ -348,9 +524,9 @@ def home():
         "status": "🟢 RUNNING",
         "service": "Facebook Messenger Auto-Reply Bot",
         "version": "2.0",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": iso_now(),
         "replies_loaded": len(bot_state.load_replies()),
-        "active_users": len(bot_state.user_states),
+        "active_users": bot_state.active_user_count(),
         "webhook_url": "/webhook",
         "management": {
             "reload_replies": "POST /reload_replies",
@@ -372,7 +548,7 @@ def reload_replies():
             "message": "✅ Replies reloaded successfully",
             "old_count": old_count,
             "new_count": new_count,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": iso_now()
         })
     except Exception as e:
         logger.error(f"[-] Error reloading replies: {e}")
@@ -388,22 +564,22 @@ def stats():
         "bot_statistics": {
             "global_reply_index": bot_state.reply_index,
             "total_replies_available": len(bot_state.load_replies()),
-            "active_users": len(bot_state.user_states),
-            "last_replies_reload": datetime.fromtimestamp(bot_state.last_reply_reload).isoformat() if bot_state.last_reply_reload else None
+            "active_users": bot_state.active_user_count(),
+            "last_replies_reload": bot_state.last_reply_reload_iso
         },
         "user_activity": {
             user_id: {
-                "reply_index": state["reply_index"],
-                "last_active": datetime.fromtimestamp(state["last_active"]).isoformat()
+                "reply_index": reply_index,
+                "last_active": last_active
             }
-            for user_id, state in list(bot_state.user_states.items())[:10]  # Show max 10 users
+            for user_id, reply_index, last_active in bot_state.user_activity(10)  # Show max 10 users
         },
         "configuration": {
             "api_version": config.api_version,
             "has_access_token": bool(config.page_access_token),
             "verify_token_set": bool(config.verify_token)
         },
-        "timestamp": datetime.now().isoformat()
+        "timestamp": iso_now()
     })
 
 @app.route("/test", methods=["GET"])
@@ -412,7 +588,7 @@ def test_endpoint():
     return jsonify({
         "message": "🚀 Bot is deployed and running!",
         "test_successful": True,
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": iso_now(),
         "ready_for_facebook": bool(config.page_access_token)
     })
 
@@ -423,6 +599,10 @@ def background_maintenance():
         time.sleep(300)  # Run every 5 minutes
         bot_state.cleanup_inactive_users()
 
+# Started at import so it also runs under gunicorn, where __main__ is skipped
+maintenance_thread = threading.Thread(target=background_maintenance, daemon=True)
+maintenance_thread.start()
+
 # Error handlers
 @app.errorhandler(404)
 def not_found(error):
@@ -458,11 +638,7 @@ if __name__ == "__main__":
     print(f"📝 Replies: {len(bot_state.replies_cache)} loaded")
     print("=" * 60)
     
-    # Start background maintenance
-    maintenance_thread = threading.Thread(target=background_maintenance, daemon=True)
-    maintenance_thread.start()
-    
-    # Start the Flask app
+    # Start the Flask dev server (use gunicorn with gevent workers in production)
     port = int(os.getenv("PORT", 5000))
     app.run(
         host="0.0.0.0",